@@ -51,6 +51,22 @@ class JupyterKernelManager(AbstractPubSubManager):
         msg = self._client.session.msg(msg_type, content, parent, header, metadata)
         self.outbound_queue.put_nowait(QueuedMessage(topic_name, msg, None))
 
+    async def send_with_backpressure(
+        self,
+        topic_name: str,
+        msg_type: str,
+        content: Optional[dict],
+        parent: Optional[dict] = None,
+        header: Optional[dict] = None,
+        metadata: Optional[dict] = None,
+        *,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        msg = self._client.session.msg(msg_type, content, parent, header, metadata)
+        return await self._put_with_timeout(
+            self.outbound_queue, QueuedMessage(topic_name, msg, None), timeout
+        )
+
     async def _publish(self, message: QueuedMessage):
         topic_name = message.topic
         if not hasattr(self._client, f"{topic_name}_channel"):
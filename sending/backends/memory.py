@@ -35,6 +35,8 @@ class InMemoryPubSubManager(AbstractPubSubManager):
 
     async def _poll(self):
         msg = await self.message_queue.get()
-        if msg.topic in self.subscribed_topics:
-            self.schedule_for_delivery(msg.topic, msg.contents, msg.session_id)
+        if self.is_subscribed_to_topic(msg.topic):
+            # msg is already the QueuedMessage we'd build in schedule_for_delivery,
+            # and they're immutable, so hand it over as-is.
+            self.inbound_queue.put_nowait(msg)
         self.message_queue.task_done()
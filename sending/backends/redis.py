@@ -1,3 +1,5 @@
+from typing import List
+
 import aioredis
 
 from ..base import AbstractPubSubManager, QueuedMessage
@@ -25,9 +27,18 @@ class RedisPubSubManager(AbstractPubSubManager):
     async def _cleanup_topic_subscription(self, topic_name: str):
         await self._redis_pubsub.unsubscribe(topic_name)
 
+    async def _cleanup_topic_subscriptions(self, topic_names: List[str]):
+        await self._redis_pubsub.unsubscribe(*topic_names)
+
     async def _publish(self, message: QueuedMessage):
         await self._redis.publish(message.topic, message.contents)
 
+    async def _publish_batch(self, messages: List[QueuedMessage]):
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for message in messages:
+                pipe.publish(message.topic, message.contents)
+            await pipe.execute()
+
     async def _poll(self):
         if self._redis_pubsub.subscribed:
             msg = await self._redis_pubsub.get_message(ignore_subscribe_messages=True)
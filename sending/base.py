@@ -2,20 +2,44 @@
    implementing custom managers or other features."""
 import abc
 import asyncio
+import inspect
+import itertools
 from collections import defaultdict, namedtuple
-from functools import partial, wraps
-from typing import Callable, Coroutine, Dict, List, Set
-from uuid import UUID, uuid4
+from functools import wraps
+from typing import Callable, Collection, Dict, List, Optional, Set
+from uuid import uuid4
 
 from .logging import logger
+from .swap_queue import SwapQueue
 from .util import ensure_async
 
 QueuedMessage = namedtuple("QueuedMessage", ["topic", "contents", "session_id"])
-Callback = namedtuple("Callback", ["method", "predicate"])
+Callback = namedtuple("Callback", ["method", "predicate", "is_async", "session_id", "topic"])
 
 __not_in_a_session__ = object()
 
 
+class _DetachHandle:
+    """Returned when registering a callback, calling it detaches the callback again.
+
+    Used instead of a `functools.partial` so registering only makes one small allocation.
+    """
+
+    __slots__ = ("_owner", "_cb_id")
+
+    def __init__(self, owner, cb_id):
+        self._owner = owner
+        self._cb_id = cb_id
+
+    @property
+    def cb_id(self) -> int:
+        """Id of the callback this handle detaches."""
+        return self._cb_id
+
+    def __call__(self):
+        return self._owner._detach_callback(self._cb_id)
+
+
 class AbstractPubSubManager(abc.ABC):
     """
     Manages the publish-subscribe workflow.
@@ -30,18 +54,44 @@ class AbstractPubSubManager(abc.ABC):
     def __init__(self):
         self.outbound_queue: asyncio.Queue[QueuedMessage] = None
         self.outbound_workers: List[asyncio.Task] = []
+        self.outbound_batch_size: int = None
 
-        self.inbound_queue: asyncio.Queue[QueuedMessage] = None
+        self.inbound_queue: SwapQueue[QueuedMessage] = None
         self.inbound_workers: List[asyncio.Task] = []
+        self._callback_semaphore: Optional[asyncio.Semaphore] = None
 
         self.poll_workers: List[asyncio.Task] = []
-        self.subscribed_topics_by_session: Dict[str, Set] = defaultdict(set)
+        self.subscribed_topics_by_session: Dict[str, Set[str]] = {}
+        # Number of sessions subscribed to each topic
+        self._global_topic_refcount: Dict[str, int] = defaultdict(int)
+
+        self.callbacks_by_id: Dict[int, Callback] = {}
+        self.callback_ids_by_session: Dict[str, Set[int]] = {}
+        # Only callbacks registered with on_topic
+        self.callback_ids_by_topic: Dict[str, Set[int]] = defaultdict(set)
+        self._cb_id_gen = itertools.count(1)
+        self._callbacks_version: int = 0
 
-        self.callbacks_by_id: Dict[UUID, Callback] = {}
-        self.callback_ids_by_session: Dict[UUID, Set[UUID]] = defaultdict(set)
+        self.inbound_message_hook = None
+        self.outbound_message_hook = None
 
-        self.inbound_message_hook: Coroutine = None
-        self.outbound_message_hook: Coroutine = None
+    @property
+    def inbound_message_hook(self) -> Optional[Callable]:
+        return self._inbound_message_hook
+
+    @inbound_message_hook.setter
+    def inbound_message_hook(self, hook: Optional[Callable]):
+        self._inbound_message_hook = hook
+        self._inbound_message_hook_async = ensure_async(hook) if hook is not None else None
+
+    @property
+    def outbound_message_hook(self) -> Optional[Callable]:
+        return self._outbound_message_hook
+
+    @outbound_message_hook.setter
+    def outbound_message_hook(self, hook: Optional[Callable]):
+        self._outbound_message_hook = hook
+        self._outbound_message_hook_async = ensure_async(hook) if hook is not None else None
 
     async def initialize(
         self,
@@ -50,10 +100,17 @@ class AbstractPubSubManager(abc.ABC):
         inbound_workers=1,
         outbound_workers=1,
         poll_workers=1,
+        outbound_batch_size=256,
+        max_concurrent_callbacks=None,
     ):
         """Initialize a pub-sub channel, specifically its queues and workers."""
+        if outbound_batch_size < 1:
+            raise ValueError(f"outbound_batch_size must be at least 1, got {outbound_batch_size}")
+        self.outbound_batch_size = outbound_batch_size
+        if max_concurrent_callbacks:
+            self._callback_semaphore = asyncio.Semaphore(max_concurrent_callbacks)
         self.outbound_queue = asyncio.Queue(queue_size)
-        self.inbound_queue = asyncio.Queue(queue_size)
+        self.inbound_queue = SwapQueue(queue_size, consumers=inbound_workers)
 
         for i in range(outbound_workers):
             self.outbound_workers.append(asyncio.create_task(self._outbound_worker()))
@@ -73,28 +130,28 @@ class AbstractPubSubManager(abc.ABC):
 
         self.outbound_queue = None
 
-        for worker in self.outbound_workers:
-            worker.cancel()
-
-        for worker in self.inbound_workers:
-            worker.cancel()
-
-        for worker in self.poll_workers:
-            worker.cancel()
-
-        await asyncio.gather(
-            *self.outbound_workers,
-            *self.inbound_workers,
-            *self.poll_workers,
-            return_exceptions=True,
-        )
+        self._callback_semaphore = None
 
+        workers = self.outbound_workers + self.inbound_workers + self.poll_workers
         self.outbound_workers.clear()
         self.inbound_workers.clear()
         self.poll_workers.clear()
+
+        for worker in workers:
+            worker.cancel()
+
+        if workers:
+            await asyncio.wait(workers)
+        for worker in workers:
+            # Retrieve exceptions from workers that crashed rather than being cancelled
+            if not worker.cancelled() and worker.exception() is not None:
+                logger.error("Worker exited with an exception", exc_info=worker.exception())
         self.subscribed_topics_by_session.clear()
+        self._global_topic_refcount.clear()
         self.callbacks_by_id.clear()
         self.callback_ids_by_session.clear()
+        self.callback_ids_by_topic.clear()
+        self._callbacks_version += 1
 
     async def _drain_queues(self):
         await self.inbound_queue.join()
@@ -104,14 +161,50 @@ class AbstractPubSubManager(abc.ABC):
         """Sends a message to a specific topic's queue."""
         self.outbound_queue.put_nowait(QueuedMessage(topic_name, message, None))
 
+    async def send_with_backpressure(
+        self, topic_name: str, message, *, timeout: Optional[float] = None
+    ) -> bool:
+        """Sends a message to a specific topic's queue, waiting up to `timeout` seconds
+        for room if the queue is full. The message is dropped if no room frees up in time.
+        With the default `timeout` of None this blocks until there is room, so the
+        message is never dropped.
+
+        Returns whether the message was queued.
+        """
+        return await self._put_with_timeout(
+            self.outbound_queue, QueuedMessage(topic_name, message, None), timeout
+        )
+
+    async def _put_with_timeout(
+        self, queue, message: QueuedMessage, timeout: Optional[float]
+    ) -> bool:
+        try:
+            # Don't yield to the event loop unless the queue is actually full
+            queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        try:
+            await asyncio.wait_for(queue.put(message), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Dropping message for topic '{message.topic}', queue still full after {timeout}s"
+            )
+            return False
+
     async def subscribe_to_topic(self, topic_name: str, _session_id=__not_in_a_session__):
         """Subscribe to a publisher's topic"""
         if not self.is_subscribed_to_topic(topic_name):
             logger.info(f"Creating subscription to topic '{topic_name}'")
             await self._create_topic_subscription(topic_name)
 
-        logger.debug(f"Adding topic '{topic_name}' to session cache: {_session_id}")
-        self.subscribed_topics_by_session[_session_id].add(topic_name)
+        session_topics = self.subscribed_topics_by_session.setdefault(_session_id, set())
+        if topic_name not in session_topics:
+            logger.debug(f"Adding topic '{topic_name}' to session cache: {_session_id}")
+            session_topics.add(topic_name)
+            self._global_topic_refcount[topic_name] += 1
 
     @abc.abstractmethod
     async def _create_topic_subscription(self, topic_name: str):
@@ -121,50 +214,87 @@ class AbstractPubSubManager(abc.ABC):
         """Unsubscribe from a specific topic's message feed."""
         if self.is_subscribed_to_topic(topic_name, _session_id):
             logger.debug(f"Removing topic '{topic_name}' from session cache: {_session_id}")
-            self.subscribed_topics_by_session[_session_id].remove(topic_name)
+            session_topics = self.subscribed_topics_by_session[_session_id]
+            session_topics.remove(topic_name)
+            if not session_topics:
+                del self.subscribed_topics_by_session[_session_id]
+            self._release_topic(topic_name)
 
         if not self.is_subscribed_to_topic(topic_name):
             logger.info(f"No more subscriptions to topic {topic_name}, cleaning up...")
             await self._cleanup_topic_subscription(topic_name)
 
+    async def _unsubscribe_session(self, _session_id):
+        """Unsubscribe a session from all of its topics at once, cleaning up the
+        subscriptions to any topics that no other session is subscribed to."""
+        topic_names = self.subscribed_topics_by_session.pop(_session_id, ())
+        orphaned_topics = [name for name in topic_names if self._release_topic(name)]
+        if orphaned_topics:
+            logger.info(f"No more subscriptions to topics {orphaned_topics}, cleaning up...")
+            await self._cleanup_topic_subscriptions(orphaned_topics)
+
+    def _release_topic(self, topic_name: str) -> bool:
+        """Drop a session's reference to a topic, returning whether it was the last one."""
+        refcount = self._global_topic_refcount[topic_name] - 1
+        if refcount == 0:
+            del self._global_topic_refcount[topic_name]
+            return True
+
+        self._global_topic_refcount[topic_name] = refcount
+        return False
+
     @property
     def subscribed_topics(self) -> Set[str]:
-        return set(
-            [item for sublist in self.subscribed_topics_by_session.values() for item in sublist]
-        )
+        return set(self._global_topic_refcount)
 
     def is_subscribed_to_topic(self, topic_name: str, _session_id=None) -> bool:
         """Check if a client is subscribed to a specified topic."""
         if _session_id is not None:
-            return topic_name in self.subscribed_topics_by_session[_session_id]
+            session_topics = self.subscribed_topics_by_session.get(_session_id)
+            return session_topics is not None and topic_name in session_topics
         else:
-            return topic_name in self.subscribed_topics
+            return topic_name in self._global_topic_refcount
 
     @abc.abstractmethod
     async def _cleanup_topic_subscription(self, topic_name: str):
         pass
 
+    async def _cleanup_topic_subscriptions(self, topic_names: List[str]):
+        """Clean up the subscriptions to several topics at once.
+
+        Backends that can unsubscribe from many topics in a single call should
+        override this, by default each topic is cleaned up individually.
+        """
+        await asyncio.gather(*[self._cleanup_topic_subscription(name) for name in topic_names])
+
     def register_callback(
         self, fn: Callable, *, on_topic: str = None, on_predicate: Callable = None, _session_id=None
     ) -> Callable:
         """Register a subscriber callback with the publisher."""
+        if on_predicate:
+            on_predicate = ensure_async(on_predicate)
 
         async def predicate(topic, message):
             if on_topic and on_topic != topic:
                 return False
-            if on_predicate and not await ensure_async(on_predicate)(topic, message):
+            if on_predicate and not await on_predicate(topic, message):
                 return False
             return True
 
-        fn = ensure_async(fn)
-        cb_id = str(uuid4())
+        # Call sync callbacks directly rather than wrapping them with ensure_async
+        is_async = inspect.iscoroutinefunction(fn)
+        cb_id = next(self._cb_id_gen)
         logger.debug(f"Registering callback: '{cb_id}'")
-        self.callbacks_by_id[cb_id] = Callback(fn, predicate)
+        topic = on_topic or None
+        self.callbacks_by_id[cb_id] = Callback(fn, predicate, is_async, _session_id, topic)
+        self._callbacks_version += 1
 
         if _session_id is not None:
-            self.callback_ids_by_session[_session_id].add(cb_id)
+            self.callback_ids_by_session.setdefault(_session_id, set()).add(cb_id)
+        if topic is not None:
+            self.callback_ids_by_topic[topic].add(cb_id)
 
-        return partial(self._detach_callback, cb_id, _session_id)
+        return _DetachHandle(self, cb_id)
 
     def callback(self, on_topic=None, on_predicate=None) -> Callable:
         def decorator(fn):
@@ -178,28 +308,82 @@ class AbstractPubSubManager(abc.ABC):
 
         return decorator
 
-    def _detach_callback(self, cb_id: UUID, _session_id: UUID):
-        callback = self.callbacks_by_id.get(cb_id)
-        if callback is not None:
-            logger.info(f"Detaching callback: '{cb_id}'")
-            del self.callbacks_by_id[cb_id]
-
-            if _session_id is not None:
-                self.callback_ids_by_session[_session_id].remove(cb_id)
+    def _detach_callback(self, cb_id: int):
+        callback = self.callbacks_by_id.pop(cb_id, None)
+        if callback is None:
+            return
+
+        logger.info(f"Detaching callback: '{cb_id}'")
+        self._callbacks_version += 1
+
+        if callback.session_id is not None:
+            session_cb_ids = self.callback_ids_by_session[callback.session_id]
+            session_cb_ids.remove(cb_id)
+            if not session_cb_ids:
+                del self.callback_ids_by_session[callback.session_id]
+        if callback.topic is not None:
+            self._unindex_topic_callback(callback.topic, cb_id)
+
+    def _unindex_topic_callback(self, topic: str, cb_id: int):
+        topic_cb_ids = self.callback_ids_by_topic[topic]
+        topic_cb_ids.discard(cb_id)
+        if not topic_cb_ids:
+            del self.callback_ids_by_topic[topic]
+
+    def _detach_session_callbacks(self, _session_id):
+        """Detach every callback registered by a session in one pass."""
+        cb_ids = self.callback_ids_by_session.pop(_session_id, ())
+        for cb_id in cb_ids:
+            callback = self.callbacks_by_id.pop(cb_id, None)
+            if callback is not None and callback.topic is not None:
+                self._unindex_topic_callback(callback.topic, cb_id)
+
+        if cb_ids:
+            logger.info(f"Detached {len(cb_ids)} callbacks for session: {_session_id}")
+            self._callbacks_version += 1
 
     async def _outbound_worker(self):
+        queue = self.outbound_queue
+        get_nowait = queue.get_nowait
+        task_done = queue.task_done
+        # Only batch for backends that override _publish_batch, so workers publish in parallel
+        if type(self)._publish_batch is AbstractPubSubManager._publish_batch:
+            batch_size = 1
+        else:
+            batch_size = self.outbound_batch_size
+
         while True:
-            message = await self.outbound_queue.get()
+            messages = [await queue.get()]
+            # No timer, take whatever else is already queued
+            while len(messages) < batch_size:
+                try:
+                    messages.append(get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            dequeued = len(messages)
             try:
-                if self.outbound_message_hook is not None:
-                    coro = ensure_async(self.outbound_message_hook)
-                    message = message._replace(contents=await coro(message.contents))
-                logger.debug(f"Sending message to topic: {message.topic}")
-                await self._publish(message)
+                if self._outbound_message_hook_async is not None:
+                    messages = await self._apply_outbound_hook(messages)
+
+                if messages:
+                    await self._publish_batch(messages)
             except Exception:
-                logger.exception("Uncaught exception found while publishing message")
+                logger.exception("Uncaught exception found while publishing messages")
             finally:
-                self.outbound_queue.task_done()
+                for _ in range(dequeued):
+                    task_done()
+
+    async def _apply_outbound_hook(self, messages: List[QueuedMessage]) -> List[QueuedMessage]:
+        """Run the outbound hook over each message, dropping any that it fails on."""
+        hook = self._outbound_message_hook_async
+        hooked = []
+        for message in messages:
+            try:
+                hooked.append(message._replace(contents=await hook(message.contents)))
+            except Exception:
+                logger.exception("Uncaught exception found while publishing message")
+        return hooked
 
     @abc.abstractmethod
     async def _publish(self, message: QueuedMessage):
@@ -210,41 +394,106 @@ class AbstractPubSubManager(abc.ABC):
         """
         pass
 
-    async def _inbound_worker(self):
-        while True:
-            message = await self.inbound_queue.get()
+    async def _publish_batch(self, messages: List[QueuedMessage]):
+        """Publish every message that the outbound worker dequeued in one go.
 
+        Backends with a bulk publish API should override this to send the whole
+        batch in a single round-trip. Outbound workers only drain more than one
+        message at a time for backends that do, by default each message is handed
+        to `_publish` on its own.
+        """
+        for message in messages:
             try:
-                if self.inbound_message_hook is not None:
-                    coro = ensure_async(self.inbound_message_hook)
-                    message = message._replace(contents=await coro(message.contents))
+                logger.debug("Sending message to topic: %s", message.topic)
+                await self._publish(message)
+            except Exception:
+                logger.exception("Uncaught exception found while publishing message")
 
-                if message.session_id is None:
-                    callback_ids = list(self.callbacks_by_id.keys())
-                else:
-                    callback_ids = self.callback_ids_by_session[message.session_id]
+    async def _inbound_worker(self):
+        # Ids of callbacks without a topic, rebuilt when _callbacks_version changes
+        local_version = -1
+        local_snapshot = ()
+        # The same merged with each topic's callbacks
+        local_topic_snapshots: Dict[str, tuple] = {}
+
+        queue = self.inbound_queue
+        callbacks_by_id = self.callbacks_by_id
+        callback_ids_by_session = self.callback_ids_by_session
+        callback_ids_by_topic = self.callback_ids_by_topic
+        process = self._process_inbound_message
 
-                await asyncio.gather(
-                    *[self._delegate_to_callback(message, cb_id) for cb_id in callback_ids]
-                )
-            except Exception:
-                logger.exception("Uncaught exception found while processing inbound message")
+        while True:
+            batch = await queue.swap()
+            try:
+                for message in batch:
+                    try:
+                        if message.session_id is None:
+                            if local_version != self._callbacks_version:
+                                local_snapshot = tuple(
+                                    cb_id
+                                    for cb_id, cb in callbacks_by_id.items()
+                                    if cb.topic is None
+                                )
+                                local_topic_snapshots.clear()
+                                local_version = self._callbacks_version
+
+                            topic_cb_ids = callback_ids_by_topic.get(message.topic)
+                            if topic_cb_ids:
+                                callback_ids = local_topic_snapshots.get(message.topic)
+                                if callback_ids is None:
+                                    # Sorted ids are in registration order
+                                    callback_ids = tuple(
+                                        sorted(local_snapshot + tuple(topic_cb_ids))
+                                    )
+                                    local_topic_snapshots[message.topic] = callback_ids
+                            else:
+                                callback_ids = local_snapshot
+                        else:
+                            callback_ids = callback_ids_by_session.get(message.session_id, ())
+
+                        await process(message, callback_ids)
+                    except Exception:
+                        logger.exception(
+                            "Uncaught exception found while processing inbound message"
+                        )
             finally:
-                self.inbound_queue.task_done()
+                queue.task_done(len(batch))
+
+    async def _process_inbound_message(self, message: QueuedMessage, callback_ids: Collection):
+        hook = self._inbound_message_hook_async
+        if hook is not None:
+            message = message._replace(contents=await hook(message.contents))
+
+        if not callback_ids:
+            return
+
+        if len(callback_ids) == 1:
+            # Skip gather's Task allocations for the common single-callback case
+            await self._delegate_to_callback(message, next(iter(callback_ids)))
+        else:
+            await asyncio.gather(
+                *[self._delegate_to_callback(message, cb_id) for cb_id in callback_ids]
+            )
 
-    async def _delegate_to_callback(self, message: QueuedMessage, callback_id: UUID):
+    async def _delegate_to_callback(self, message: QueuedMessage, callback_id: int):
         cb = self.callbacks_by_id.get(callback_id)
         if cb is not None:
             try:
                 if cb.predicate is None or await cb.predicate(message.topic, message.contents):
-                    logger.debug(f"Delegating to callback: {callback_id}")
+                    logger.debug("Delegating to callback: %s", callback_id)
                     # TODO(nick): I would love to have a set of kwargs that are passed around
                     # for callbacks + predicates that you opt-in to. That would be a bit easier
                     # to document and access.
-                    await cb.method(message.contents)
+                    if not cb.is_async:
+                        cb.method(message.contents)
+                    elif self._callback_semaphore is None:
+                        await cb.method(message.contents)
+                    else:
+                        async with self._callback_semaphore:
+                            await cb.method(message.contents)
                 else:
                     logger.debug(
-                        f"Skipping callback {callback_id} because predicate returned False"
+                        "Skipping callback %s because predicate returned False", callback_id
                     )
             except Exception:
                 logger.exception("Uncaught exception encountered while delegating to callback")
@@ -267,6 +516,20 @@ class AbstractPubSubManager(abc.ABC):
         message = QueuedMessage(topic, contents, _session_id)
         self.inbound_queue.put_nowait(message)
 
+    async def schedule_for_delivery_with_backpressure(
+        self, topic, contents, _session_id=None, *, timeout: Optional[float] = None
+    ) -> bool:
+        """Like `schedule_for_delivery`, but waits up to `timeout` seconds for room if the
+        inbound queue is full. The message is dropped if no room frees up in time. With the
+        default `timeout` of None this blocks until there is room, so the message is never
+        dropped.
+
+        Returns whether the message was queued.
+        """
+        return await self._put_with_timeout(
+            self.inbound_queue, QueuedMessage(topic, contents, _session_id), timeout
+        )
+
     def get_detached_session(self):
         """Get a new session for callbacks and subscriptions that won't receive
         global messages from this parent.
@@ -288,10 +551,12 @@ class DetachedPubSubSession:
     for each session.
     """
 
+    __slots__ = ("id", "parent", "_unregister_callbacks_by_id")
+
     def __init__(self, parent: AbstractPubSubManager) -> None:
         self.id: str = str(uuid4())
         self.parent: AbstractPubSubManager = parent
-        self._unregister_callbacks_by_id: Dict[str, Callable] = {}
+        self._unregister_callbacks_by_id: Dict[int, Callable] = {}
 
     def send_to_callbacks(self, contents):
         """Send contents from a publisher to all subscribed callbacks."""
@@ -302,7 +567,7 @@ class DetachedPubSubSession:
 
     @property
     def subscribed_topics(self) -> Set[str]:
-        return self.parent.subscribed_topics_by_session[self.id]
+        return self.parent.subscribed_topics_by_session.get(self.id, set())
 
     def is_subscribed_to_topic(self, topic_name: str) -> bool:
         """Check if a client is subscribed to a specified topic."""
@@ -319,41 +584,36 @@ class DetachedPubSubSession:
     def register_callback(
         self, fn: Callable, *, on_topic: str = None, on_predicate: Callable = None
     ):
+        """Register a subscriber callback with the publisher."""
+        if on_predicate:
+            on_predicate = ensure_async(on_predicate)
+
         async def combined_predicates(topic, contents):
             if topic and not self.is_subscribed_to_topic(topic):
                 return False
-            if on_predicate and not await ensure_async(on_predicate)(topic, contents):
+            if on_predicate and not await on_predicate(topic, contents):
                 return False
             return True
 
-        unregister_callback_id = str(uuid4())
         unregister_callback = self.parent.register_callback(
             fn, on_topic=on_topic, on_predicate=combined_predicates, _session_id=self.id
         )
-        """Register a subscriber callback with the publisher."""
-        self._unregister_callbacks_by_id[unregister_callback_id] = unregister_callback
-        return partial(self._detach_callback, unregister_callback_id)
+        cb_id = unregister_callback.cb_id
+        self._unregister_callbacks_by_id[cb_id] = unregister_callback
+        return _DetachHandle(self, cb_id)
 
-    def _detach_callback(self, cb_id: str):
+    def _detach_callback(self, cb_id: int):
         # We do a second layer of ID-Callback caching here so that we can support
-        # the detaching of callbacks mid-session but also so that we can pull the
-        # session's cache of unregister callback methods and run them in batch
-        # during cleanup.
-        parent_detach_callback = self._unregister_callbacks_by_id.get(cb_id)
+        # the detaching of callbacks mid-session.
+        parent_detach_callback = self._unregister_callbacks_by_id.pop(cb_id, None)
         if parent_detach_callback is not None:
-            del self._unregister_callbacks_by_id[cb_id]
             return parent_detach_callback()
 
     async def stop(self):
         """Stop the processes and clear callbacks"""
-        for cb in self._unregister_callbacks_by_id.values():
-            cb()
-
         self._unregister_callbacks_by_id.clear()
-
-        await asyncio.gather(
-            *[self.unsubscribe_from_topic(topic_name) for topic_name in self.subscribed_topics]
-        )
+        self.parent._detach_session_callbacks(self.id)
+        await self.parent._unsubscribe_session(self.id)
 
     async def __aenter__(self):
         return self
@@ -370,7 +630,11 @@ class PubSubSession(DetachedPubSubSession):
     automatically without client input.
     """
 
+    __slots__ = ()
+
     @property
     def subscribed_topics(self) -> Set[str]:
-        all_session_topics = self.parent.subscribed_topics_by_session[__not_in_a_session__]
+        all_session_topics = self.parent.subscribed_topics_by_session.get(
+            __not_in_a_session__, set()
+        )
         return super().subscribed_topics | all_session_topics
@@ -0,0 +1,90 @@
+"""A queue whose consumers take everything that has been buffered in one go"""
+import asyncio
+from collections import deque
+from typing import Deque, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SwapQueue(Generic[T]):
+    """
+    A buffer-swapping queue for consumers that process items in batches.
+
+    Producers append to a deque with `put_nowait`. A consumer calls `swap`, which waits until
+    something has been buffered and then takes its share of the buffer. With a single
+    consumer that's the whole buffer, leaving a fresh one in its place. With several, each
+    swap takes at most `1 / consumers` of what's buffered so the consumers can work through
+    it in parallel. Unlike `asyncio.Queue`, no futures are created per item, only a single
+    event is used to wake up consumers.
+
+    `task_done` and `join` behave like they do on `asyncio.Queue` so that the queue can be
+    drained before shutting down.
+    """
+
+    def __init__(self, maxsize: int = 0, consumers: int = 1):
+        self.maxsize = maxsize
+        self.consumers = max(consumers, 1)
+        self._buf: Deque[T] = deque()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._unfinished_tasks = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+    def qsize(self) -> int:
+        """Number of items buffered and not yet swapped out by a consumer."""
+        return len(self._buf)
+
+    def empty(self) -> bool:
+        return not self._buf
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self._buf)
+
+    def put_nowait(self, item: T):
+        """Buffer an item, raising `asyncio.QueueFull` if there's no room for it."""
+        if self.full():
+            raise asyncio.QueueFull
+        self._buf.append(item)
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._not_empty.set()
+
+    async def put(self, item: T):
+        """Buffer an item, waiting for a consumer to make room for it if needed."""
+        while self.full():
+            self._not_full.clear()
+            await self._not_full.wait()
+        self.put_nowait(item)
+
+    async def swap(self) -> Deque[T]:
+        """Wait for at least one item and take this consumer's share of the buffer."""
+        while not self._buf:
+            # Several consumers can be woken up by the same event. Each one takes
+            # its share and whoever finds the buffer empty goes back to waiting.
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        share = -(-len(self._buf) // self.consumers)
+        if share >= len(self._buf):
+            batch = self._buf
+            self._buf = deque()
+        else:
+            popleft = self._buf.popleft
+            batch = deque(popleft() for _ in range(share))
+
+        self._not_full.set()
+        return batch
+
+    def task_done(self, count: int = 1):
+        """Mark `count` previously swapped out items as processed."""
+        if count > self._unfinished_tasks:
+            raise ValueError("task_done() called too many times")
+        self._unfinished_tasks -= count
+        if self._unfinished_tasks == 0:
+            self._finished.set()
+
+    async def join(self):
+        """Wait until every item that has been put has been marked as done."""
+        if self._unfinished_tasks > 0:
+            await self._finished.wait()
@@ -1,3 +1,4 @@
+import asyncio
 from functools import partial
 
 import pytest
@@ -14,6 +15,21 @@ async def manager():
     await mgr.shutdown(now=True)
 
 
+@pytest.fixture()
+async def manager_factory():
+    managers = []
+
+    async def factory(cls=InMemoryPubSubManager, **kwargs):
+        mgr = cls()
+        await mgr.initialize(**kwargs)
+        managers.append(mgr)
+        return mgr
+
+    yield factory
+    for mgr in managers:
+        await mgr.shutdown(now=True)
+
+
 def callback(iterable, message):
     iterable.append(message)
 
@@ -22,6 +38,20 @@ async def async_callback(iterable, message):
     iterable.append(message)
 
 
+class ConcurrencyTracker:
+    """Records how many `slow_callback` calls overlapped."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def slow_callback(self, message):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+
+
 class TestInMemoryPubSubManager:
     async def test_register_callbacks(self, manager: InMemoryPubSubManager):
         cache = []
@@ -272,3 +302,214 @@ class TestInMemoryPubSubManager:
             await manager._drain_queues()
             assert len(cache) == 1
             assert cache[0] == "message"
+
+    async def test_callbacks_registered_between_messages(self, manager: InMemoryPubSubManager):
+        first_cache, second_cache = [], []
+        await manager.subscribe_to_topic("topic")
+        unsub = manager.register_callback(partial(callback, first_cache))
+        manager.send("topic", "one")
+        await manager._drain_queues()
+
+        manager.register_callback(partial(callback, second_cache))
+        manager.send("topic", "two")
+        await manager._drain_queues()
+
+        unsub()
+        manager.send("topic", "three")
+        await manager._drain_queues()
+        assert first_cache == ["one", "two"]
+        assert second_cache == ["two", "three"]
+
+    async def test_outbound_messages_are_batched(self, manager_factory):
+        batches = []
+
+        class BatchingManager(InMemoryPubSubManager):
+            async def _publish_batch(self, messages):
+                batches.append([m.contents for m in messages])
+                for message in messages:
+                    await self._publish(message)
+
+        manager = await manager_factory(BatchingManager)
+        cache = []
+        manager.register_callback(partial(callback, cache))
+        await manager.subscribe_to_topic("topic")
+        manager.send("topic", "one")
+        manager.send("topic", "two")
+        manager.send("topic", "three")
+        await manager._drain_queues()
+        assert batches == [["one", "two", "three"]]
+        assert cache == ["one", "two", "three"]
+
+    async def test_outbound_batch_size_must_be_positive(self):
+        with pytest.raises(ValueError):
+            await InMemoryPubSubManager().initialize(outbound_batch_size=0)
+
+    async def test_outbound_workers_publish_in_parallel(self, manager_factory):
+        tracker = ConcurrencyTracker()
+
+        class SlowManager(InMemoryPubSubManager):
+            async def _publish(self, message):
+                await tracker.slow_callback(message)
+
+        manager = await manager_factory(SlowManager, outbound_workers=4)
+        for i in range(4):
+            manager.send("topic", i)
+        await manager.outbound_queue.join()
+        assert tracker.max_running == 4
+
+    async def test_session_stop_cleans_up_unshared_topics(
+        self, manager: InMemoryPubSubManager, mocker
+    ):
+        cleanup = mocker.spy(manager, "_cleanup_topic_subscriptions")
+        async with manager.get_session() as other_session:
+            await other_session.subscribe_to_topic("shared")
+            async with manager.get_session() as session:
+                session.register_callback(partial(callback, []))
+                session.register_callback(partial(callback, []))
+                await session.subscribe_to_topic("shared")
+                await session.subscribe_to_topic("topic")
+                await session.subscribe_to_topic("other_topic")
+
+            cleanup.assert_called_once()
+            assert sorted(cleanup.call_args.args[0]) == ["other_topic", "topic"]
+            assert manager.subscribed_topics == {"shared"}
+            assert len(manager.callbacks_by_id) == 0
+            assert session.id not in manager.callback_ids_by_session
+
+    async def test_session_detach_callback(self, manager: InMemoryPubSubManager):
+        async with manager.get_session() as session:
+            unsub = session.register_callback(partial(callback, []))
+            assert list(manager.callbacks_by_id) == [unsub.cb_id]
+            unsub()
+            assert len(session._unregister_callbacks_by_id) == 0
+            assert len(manager.callbacks_by_id) == 0
+            assert session.id not in manager.callback_ids_by_session
+            # Detaching twice is a no-op
+            unsub()
+
+    async def test_inbound_hook_runs_without_callbacks(self, manager: InMemoryPubSubManager):
+        hooked = []
+        manager.inbound_message_hook = hooked.append
+        await manager.subscribe_to_topic("topic")
+        manager.send("topic", "message")
+        await manager._drain_queues()
+        assert hooked == ["message"]
+
+    async def test_send_with_backpressure(self, manager_factory):
+        # No outbound workers, so nothing drains the queue
+        manager = await manager_factory(queue_size=1, outbound_workers=0)
+        assert await manager.send_with_backpressure("topic", "one", timeout=0.01)
+        assert not await manager.send_with_backpressure("topic", "two", timeout=0.01)
+        assert manager.outbound_queue.qsize() == 1
+
+    async def test_schedule_for_delivery_with_backpressure(self, manager: InMemoryPubSubManager):
+        cache = []
+        manager.register_callback(partial(callback, cache))
+        assert await manager.schedule_for_delivery_with_backpressure("topic", "message")
+        await manager._drain_queues()
+        assert cache == ["message"]
+
+    async def test_schedule_for_delivery_with_backpressure_when_full(self, manager_factory):
+        # No inbound workers, so nothing drains the queue unless we swap it ourselves
+        manager = await manager_factory(queue_size=1, inbound_workers=0)
+        manager.schedule_for_delivery("topic", "one")
+        assert not await manager.schedule_for_delivery_with_backpressure(
+            "topic", "two", timeout=0.01
+        )
+        assert manager.inbound_queue.qsize() == 1
+
+        waiting = asyncio.create_task(
+            manager.schedule_for_delivery_with_backpressure("topic", "three", timeout=1)
+        )
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        assert [m.contents for m in await manager.inbound_queue.swap()] == ["one"]
+        assert await waiting
+        assert [m.contents for m in await manager.inbound_queue.swap()] == ["three"]
+
+    async def test_max_concurrent_callbacks(self, manager_factory):
+        manager = await manager_factory(max_concurrent_callbacks=1)
+        tracker = ConcurrencyTracker()
+        manager.register_callback(tracker.slow_callback)
+        manager.register_callback(tracker.slow_callback)
+        await manager.subscribe_to_topic("topic")
+        manager.send("topic", "message")
+        await manager._drain_queues()
+        assert tracker.max_running == 1
+
+    async def test_callbacks_indexed_by_topic(self, manager: InMemoryPubSubManager):
+        cache = []
+        unsub = manager.register_callback(partial(callback, cache), on_topic="topic")
+        manager.register_callback(partial(callback, cache))
+        assert len(manager.callback_ids_by_topic["topic"]) == 1
+
+        async with manager.get_session() as session:
+            session.register_callback(partial(callback, cache), on_topic="topic")
+            assert len(manager.callback_ids_by_topic["topic"]) == 2
+        assert len(manager.callback_ids_by_topic["topic"]) == 1
+
+        await manager.subscribe_to_topic("topic")
+        manager.send("topic", "message")
+        await manager._drain_queues()
+        assert cache == ["message", "message"]
+
+        unsub()
+        assert "topic" not in manager.callback_ids_by_topic
+
+    async def test_topic_callbacks_run_in_registration_order(self, manager: InMemoryPubSubManager):
+        cache = []
+        manager.register_callback(lambda message: cache.append("a"), on_topic="topic")
+        manager.register_callback(lambda message: cache.append("b"))
+        manager.register_callback(lambda message: cache.append("c"), on_topic="topic")
+        await manager.subscribe_to_topic("topic")
+        manager.send("topic", "message")
+        await manager._drain_queues()
+        assert cache == ["a", "b", "c"]
+
+        manager.register_callback(lambda message: cache.append("d"))
+        cache.clear()
+        manager.send("topic", "message")
+        await manager._drain_queues()
+        assert cache == ["a", "b", "c", "d"]
+
+    async def test_session_lookups_do_not_create_entries(self, manager: InMemoryPubSubManager):
+        async with manager.get_session() as session:
+            assert not session.is_subscribed_to_topic("topic")
+            assert not manager.is_subscribed_to_topic("topic", session.id)
+            session.send_to_callbacks("message")
+            await manager._drain_queues()
+            assert session.id not in manager.subscribed_topics_by_session
+            assert session.id not in manager.callback_ids_by_session
+
+            await session.subscribe_to_topic("topic")
+            await session.unsubscribe_from_topic("topic")
+            assert session.id not in manager.subscribed_topics_by_session
+
+    async def test_inbound_workers_process_in_parallel(self, manager_factory):
+        manager = await manager_factory(inbound_workers=4)
+        tracker = ConcurrencyTracker()
+        manager.register_callback(tracker.slow_callback)
+        for i in range(4):
+            manager.schedule_for_delivery("topic", i)
+        await manager._drain_queues()
+        assert tracker.max_running == 4
+
+    async def test_inbound_worker_survives_bad_message(self, manager: InMemoryPubSubManager):
+        cache = []
+        manager.register_callback(partial(callback, cache))
+        # Unhashable topics can't be looked up in the topic index
+        manager.schedule_for_delivery(["bad"], "x")
+        manager.schedule_for_delivery("ok", "y")
+        await asyncio.wait_for(manager._drain_queues(), 1)
+        assert cache == ["y"]
+        assert not any(worker.done() for worker in manager.inbound_workers)
+
+    async def test_shutdown_logs_crashed_workers(self, manager: InMemoryPubSubManager, caplog):
+        async def crash():
+            raise RuntimeError("boom")
+
+        crashed = asyncio.create_task(crash())
+        await asyncio.sleep(0)
+        manager.poll_workers.append(crashed)
+        await manager.shutdown(now=True)
+        assert [r.exc_info[1] for r in caplog.records] == [crashed.exception()]
@@ -35,3 +35,39 @@ class TestRedisBackend:
         await asyncio.sleep(1)
         await mgr.shutdown()
         cb.assert_called_once()
+
+    async def test_redis_publish_batch(self, mocker):
+        cb = mocker.MagicMock()
+        mgr = RedisPubSubManager(REDIS_DSN)
+        await mgr.initialize()
+        mgr.register_callback(cb)
+        publish_batch = mocker.spy(mgr, "_publish_batch")
+
+        await mgr.subscribe_to_topic("topic")
+        for i in range(3):
+            mgr.send("topic", f"test {i}")
+        await asyncio.sleep(1)
+        await mgr._drain_queues()
+        publish_batch.assert_called()
+        assert [call.args[0] for call in cb.call_args_list] == [b"test 0", b"test 1", b"test 2"]
+
+        await mgr.shutdown()
+
+    async def test_redis_session_cleanup_unsubscribes_topics(self, mocker):
+        cb = mocker.MagicMock()
+        mgr = RedisPubSubManager(REDIS_DSN)
+        await mgr.initialize()
+
+        async with mgr.get_session() as session:
+            session.register_callback(cb)
+            await session.subscribe_to_topic("topic")
+            await session.subscribe_to_topic("other_topic")
+            await asyncio.sleep(1)
+            assert mgr._redis_pubsub.subscribed
+
+        assert not mgr._redis_pubsub.subscribed
+        mgr.send("topic", "test!")
+        mgr.send("other_topic", "test!")
+        await asyncio.sleep(1)
+        await mgr.shutdown()
+        cb.assert_not_called()
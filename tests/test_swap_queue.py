@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from sending.swap_queue import SwapQueue
+
+
+class TestSwapQueue:
+    async def test_swap_takes_everything_buffered(self):
+        queue = SwapQueue()
+        queue.put_nowait(1)
+        queue.put_nowait(2)
+        assert list(await queue.swap()) == [1, 2]
+        assert queue.empty()
+
+    async def test_swap_waits_for_an_item(self):
+        queue = SwapQueue()
+        swap = asyncio.create_task(queue.swap())
+        await asyncio.sleep(0)
+        assert not swap.done()
+        queue.put_nowait("item")
+        assert list(await asyncio.wait_for(swap, 1)) == ["item"]
+
+    async def test_put_nowait_when_full(self):
+        queue = SwapQueue(maxsize=1)
+        queue.put_nowait(1)
+        with pytest.raises(asyncio.QueueFull):
+            queue.put_nowait(2)
+
+    async def test_join_waits_for_task_done(self):
+        queue = SwapQueue()
+        queue.put_nowait(1)
+        queue.put_nowait(2)
+        batch = await queue.swap()
+        join = asyncio.create_task(queue.join())
+        await asyncio.sleep(0)
+        assert not join.done()
+        queue.task_done(len(batch))
+        await asyncio.wait_for(join, 1)
+
+    async def test_task_done_too_many_times(self):
+        queue = SwapQueue()
+        queue.put_nowait(1)
+        with pytest.raises(ValueError):
+            queue.task_done(2)
+
+    async def test_put_waits_for_swap(self):
+        queue = SwapQueue(maxsize=1)
+        queue.put_nowait(1)
+        put = asyncio.create_task(queue.put(2))
+        await asyncio.sleep(0)
+        assert not put.done()
+        assert list(await queue.swap()) == [1]
+        await asyncio.wait_for(put, 1)
+        assert list(await queue.swap()) == [2]
+
+    async def test_swap_shares_between_consumers(self):
+        queue = SwapQueue(consumers=3)
+        swaps = [asyncio.create_task(queue.swap()) for _ in range(3)]
+        await asyncio.sleep(0)
+        for i in range(4):
+            queue.put_nowait(i)
+        batches = await asyncio.wait_for(asyncio.gather(*swaps), 1)
+        assert sorted(len(batch) for batch in batches) == [1, 1, 2]
+        assert sorted(item for batch in batches for item in batch) == [0, 1, 2, 3]